@@ -1,16 +1,37 @@
 import argparse
 import datetime
+import functools
 import json
 import os
+import sys
 import threading
+import time
 from time import sleep
-from PIL import Image
 import xml.etree.ElementTree as ET
-import yaml
 
+from src.utils.config_validation import validate_inputs
 from src.utils.driver_utils import create_driver, keep_driver_live
-from src.modules.llm_client import generate_next_action, read_file_content
-from src.modules.actions import process_next_action
+from src.utils.image_utils import (
+    changed_region,
+    crop_for_region,
+    format_image,
+    image_extension,
+    resolve_image_policy,
+)
+from src.utils.report_store import (
+    ReportStore,
+    current_time,
+    remove_step_captures,
+    remove_steps_after,
+    step_artifacts,
+)
+from src.utils.run_journal import RunJournal
+from src.modules.llm_client import (
+    DEFAULT_MODEL,
+    generate_next_action,
+    read_file_content,
+)
+from src.modules.actions import final_action, process_next_action
 
 
 class PlatformDetector:
@@ -39,34 +60,6 @@ def create_folder(folder_path):
     return folder_path
 
 
-def resize_image(img, max_long=2048, max_short=768):
-    """Resize the image maintaining aspect ratio"""
-    original_width, original_height = img.size
-    aspect_ratio = original_width / original_height
-
-    if aspect_ratio > 1:
-        new_width = min(original_width, max_long)
-        new_height = int(new_width / aspect_ratio)
-        new_height = min(new_height, max_short)
-        new_width = int(new_height * aspect_ratio)
-    else:
-        new_height = min(original_height, max_long)
-        new_width = int(new_height * aspect_ratio)
-        new_width = min(new_width, max_short)
-        new_height = int(new_width / aspect_ratio)
-
-    return img.resize((new_width, new_height))
-
-
-def format_image(image_path, output_path):
-    """Format image for consistent processing"""
-    with Image.open(image_path) as img:
-        width, height = img.size
-        new_img = Image.new("RGB", (width, height), "white")
-        new_img.paste(img)
-        resize_image(new_img).save(output_path)
-
-
 def write_to_file(file_path, string_to_write):
     with open(file_path, "w") as file:
         file.write(string_to_write)
@@ -160,6 +153,8 @@ def xml_to_dict(xml_element: ET.Element):
 
 def xml_str_to_yaml(yaml_file, xml_str):
     """Convert XML string to YAML file"""
+    import yaml
+
     try:
         root = ET.fromstring(xml_str)
         xml_dict = xml_to_dict(root)
@@ -185,7 +180,7 @@ def take_page_source(driver, folder, name, platform):
         return xml_str_to_yaml(f"{folder}/{name}.yaml", driver.page_source)
 
 
-def take_screenshot(driver, folder, name, platform):
+def take_screenshot(driver, folder, name, platform, image_policy=None):
     """Take screenshot based on platform"""
     screenshot_path = f"{folder}/{name}.png"
 
@@ -195,8 +190,32 @@ def take_screenshot(driver, folder, name, platform):
         # Mobile platforms
         driver.save_screenshot(screenshot_path)
 
-    format_image(screenshot_path, f"{folder}/{name}.jpg")
-    return f"{folder}/{name}.jpg"
+    return format_image(
+        screenshot_path,
+        f"{folder}/{name}.{image_extension(image_policy)}",
+        image_policy,
+    )
+
+
+def prepare_llm_image(folder, name, screenshot_file, previous_name, image_policy):
+    """Select the image sent to the LLM for the screen captured as ``name``.
+
+    Returns ``None`` when the policy disables images. With the ``changed``
+    crop mode the image is cropped to the area that differs from the
+    ``previous_name`` screenshot when that area is small enough.
+    """
+    if not image_policy["send"]:
+        return None
+    if image_policy["crop"] != "changed" or previous_name is None:
+        return screenshot_file
+    region = changed_region(f"{folder}/{previous_name}.png", f"{folder}/{name}.png")
+    cropped = crop_for_region(
+        f"{folder}/{name}.png",
+        f"{folder}/{name}_changed.{image_extension(image_policy)}",
+        image_policy,
+        region,
+    )
+    return cropped or screenshot_file
 
 
 def get_current_timestamp():
@@ -204,6 +223,50 @@ def get_current_timestamp():
     return now.strftime("%Y-%m-%d-%H-%M-%S")
 
 
+def dry_run(prompt_file, task_file, config_file):
+    """Validate the input files without creating a driver"""
+    errors = []
+    contents = {}
+    for label, file_path in [
+        ("prompt", prompt_file),
+        ("task", task_file),
+        ("config", config_file),
+    ]:
+        contents[label] = read_file_content(file_path)
+        if contents[label] is None:
+            errors.append(f"Unable to read {label} file '{file_path}'")
+
+    parsed = {}
+    for label in ["task", "config"]:
+        try:
+            parsed[label] = json.loads(contents[label] or "null")
+        except json.JSONDecodeError as err:
+            errors.append(f"Invalid JSON in {label} file: {err}")
+            parsed[label] = None
+
+    config = parsed["config"] if isinstance(parsed["config"], dict) else {}
+    errors.extend(
+        validate_inputs(
+            contents["prompt"],
+            parsed["task"],
+            parsed["config"],
+            config.get("model", DEFAULT_MODEL),
+        )
+    )
+
+    for error in errors:
+        print(f"Error: {error}")
+    if errors:
+        return 1
+    tasks = parsed["task"]
+    active = [task for task in tasks if not task.get("skip", False)]
+    print(
+        f"OK: {len(active)} of {len(tasks)} tasks would run on "
+        f"{config['platform']}"
+    )
+    return 0
+
+
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Universal AI Testing Tool")
     parser.add_argument("prompt", help="Prompt file")
@@ -216,16 +279,51 @@ if __name__ == "__main__":
         "--debug", action="store_true", help="Enable debug mode"
     )
     parser.add_argument("--reports", default="./reports", help="Reports folder")
+    parser.add_argument(
+        "--journal",
+        help="Run journal file (defaults to <reports>/journal.jsonl)",
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Skip completed tasks and resume interrupted ones from the journal",
+    )
+    parser.add_argument(
+        "--store",
+        help="Report index database (defaults to <reports>/reports.db)",
+    )
+    parser.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="Validate the prompt, task and config files without a driver",
+    )
 
     args = parser.parse_args()
 
+    if args.dry_run:
+        sys.exit(dry_run(args.prompt, args.task, args.config))
+
     prompt = read_file_content(args.prompt)
     tasks = json.loads(read_file_content(args.task))
     platform_config = json.loads(read_file_content(args.config))
 
+    journal = RunJournal(
+        args.journal or f"{create_folder(args.reports)}/journal.jsonl"
+    )
+    if not args.resume:
+        journal.start_suite(args.task)
+    elif not journal.can_resume(args.task):
+        print(
+            f"Error: the journal was recorded for {journal.task_file}, "
+            f"not {os.path.abspath(args.task)}"
+        )
+        sys.exit(1)
+    store = ReportStore(args.store or f"{create_folder(args.reports)}/reports.db")
+
     # Create driver based on platform
     driver = create_driver(args.appium, platform_config)
     platform = platform_config.get("platform", "").lower()
+    model = platform_config.get("model", DEFAULT_MODEL)
 
     # For web, navigate to initial URL
     if platform == "web" and "url" in platform_config:
@@ -245,11 +343,34 @@ if __name__ == "__main__":
             print(f"Skipping {name}")
             continue
 
-        task_folder = create_folder(
-            f"{args.reports}/{name}/{get_current_timestamp()}"
+        if journal.is_completed(name):
+            print(f"Skipping completed {name}")
+            continue
+
+        resume_point = journal.resume_point(name)
+        if resume_point is not None:
+            task_folder, history_actions = resume_point
+            print(f"Resuming {name} after step {len(history_actions)}")
+        else:
+            task_folder = create_folder(
+                f"{args.reports}/{name}/{get_current_timestamp()}"
+            )
+            history_actions = []
+            write_to_file(f"{task_folder}/task.json", json.dumps(task))
+            write_to_file(
+                f"{task_folder}/config.json", json.dumps(platform_config)
+            )
+            journal.start_task(name, task_folder)
+        task_id = store.start_task(name, task_folder)
+        if resume_point is not None:
+            # Drop the failed steps the resumed run is going to redo
+            store.truncate_steps(task_id, len(history_actions))
+            remove_steps_after(task_folder, len(history_actions))
+
+        image_policy = resolve_image_policy(platform_config, model, task)
+        take_task_screenshot = functools.partial(
+            take_screenshot, image_policy=image_policy
         )
-        write_to_file(f"{task_folder}/task.json", json.dumps(task))
-        write_to_file(f"{task_folder}/config.json", json.dumps(platform_config))
 
         sleep(1)
 
@@ -258,34 +379,62 @@ if __name__ == "__main__":
         detected_platform = PlatformDetector.detect_platform(initial_source)
         print(f"Detected platform: {detected_platform}")
 
+        # A resumed task recaptures the screen of its last good step
+        step = len(history_actions)
+        remove_step_captures(task_folder, f"step_{step}")
         page_source_file = take_page_source(
-            driver, task_folder, "step_0", detected_platform
+            driver, task_folder, f"step_{step}", detected_platform
         )
-        screenshot_file = take_screenshot(
-            driver, task_folder, "step_0", detected_platform
+        screenshot_file = take_task_screenshot(
+            driver, task_folder, f"step_{step}", detected_platform
         )
 
-        history_actions = []
-        step = 0
+        image_stats = []
+        stats_file = f"{task_folder}/image_stats.json"
+        if resume_point is not None and os.path.exists(stats_file):
+            image_stats = [
+                entry
+                for entry in json.loads(read_file_content(stats_file))["steps"]
+                if entry["step"] <= step
+            ]
+        status = "max_steps"
 
         while (
             page_source_file is not None and step < 50
         ):  # Prevent infinite loops
             step += 1
+            step_started = current_time()
+            llm_start = time.perf_counter()
 
             if args.debug:
                 next_action = input("Next action: ")
             else:
+                llm_image = prepare_llm_image(
+                    task_folder,
+                    f"step_{step - 1}",
+                    screenshot_file,
+                    f"step_{step - 2}" if step > 1 else None,
+                    image_policy,
+                )
+                image_stats.append(
+                    {
+                        "step": step,
+                        "image": llm_image,
+                        "bytes": os.path.getsize(llm_image) if llm_image else 0,
+                    }
+                )
                 next_action = generate_next_action(
                     prompt,
                     details,
                     history_actions,
                     page_source_file,
-                    screenshot_file,
+                    llm_image,
                     detected_platform,
+                    model,
                 )
 
             print(f"Step {step}: {next_action}")
+            action_start = time.perf_counter()
 
             page_source_file, screenshot_file, action_result = (
                 process_next_action(
@@ -295,18 +444,48 @@ if __name__ == "__main__":
                     f"step_{step}",
                     detected_platform,
                     take_page_source,
-                    take_screenshot,
+                    take_task_screenshot,
+                    image_policy,
+                    model,
                 )
             )
 
             write_to_file(f"{task_folder}/step_{step}.json", action_result)
             history_actions.append(action_result)
+            journal.record_step(name, step, action_result)
+            store.record_step(
+                task_id,
+                step,
+                action_result,
+                step_started,
+                (action_start - llm_start) * 1000,
+                (time.perf_counter() - action_start) * 1000,
+            )
+            # Written every step so a resumed run keeps the earlier sizes
+            write_to_file(
+                stats_file,
+                json.dumps({"policy": image_policy, "steps": image_stats}),
+            )
 
             # Check if task is finished
-            result_data = json.loads(action_result)
-            if result_data["action"] in ["finish", "error"]:
+            last_action = final_action(json.loads(action_result))
+            if last_action in ["finish", "error"]:
+                status = last_action
                 break
 
+        if page_source_file is None:
+            status = "error"
+        journal.finish_task(name, status)
+        store.finish_task(task_id, status)
+
+        for step_number in range(step + 1):
+            store.record_artifacts(
+                task_id,
+                step_number,
+                step_artifacts(task_folder, f"step_{step_number}"),
+            )
+
+    store.close()
     try:
         driver.quit()
     except:
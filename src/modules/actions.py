@@ -2,17 +2,20 @@
 
 from __future__ import annotations
 
+import hashlib
 import logging
-from typing import Any, Callable, Tuple
+import re
+from typing import Any, Callable, Optional, Tuple
 import json
 from time import sleep
 
-from appium.webdriver.common.appiumby import AppiumBy
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-
-from .llm_client import verify_result
+from .llm_client import DEFAULT_MODEL, verify_result
+from ..utils.image_utils import (
+    crop_for_region,
+    image_extension,
+    image_size,
+    scale_box,
+)
 
 
 def parse_bounds(bounds: str) -> Tuple[int, int, int, int]:
@@ -25,6 +28,12 @@ def parse_bounds(bounds: str) -> Tuple[int, int, int, int]:
 
 def process_web_click(data: dict[str, Any], driver: Any) -> None:
     """Process a click action on web platforms."""
+    # Selenium and Appium load the whole client libraries on import, so the
+    # web and mobile handlers import them on first use.
+    from selenium.webdriver.common.by import By
+    from selenium.webdriver.support.ui import WebDriverWait
+    from selenium.webdriver.support import expected_conditions as EC
+
     if "xpath" in data:
         element = WebDriverWait(driver, 10).until(
             EC.element_to_be_clickable((By.XPATH, data["xpath"]))
@@ -46,6 +55,8 @@ def process_web_click(data: dict[str, Any], driver: Any) -> None:
 
 def process_mobile_tap(data: dict[str, Any], driver: Any) -> None:
     """Process a tap action on mobile platforms."""
+    from appium.webdriver.common.appiumby import AppiumBy
+
     if "bounds" in data:
         left, top, right, bottom = parse_bounds(data["bounds"])
         tap_x = left + (right - left) / 2
@@ -58,6 +69,10 @@ def process_mobile_tap(data: dict[str, Any], driver: Any) -> None:
 
 def process_web_input(data: dict[str, Any], driver: Any) -> None:
     """Process a text input action on web platforms."""
+    from selenium.webdriver.common.by import By
+    from selenium.webdriver.support.ui import WebDriverWait
+    from selenium.webdriver.support import expected_conditions as EC
+
     if "xpath" in data:
         element = WebDriverWait(driver, 10).until(
             EC.presence_of_element_located((By.XPATH, data["xpath"]))
@@ -74,6 +89,8 @@ def process_web_input(data: dict[str, Any], driver: Any) -> None:
 
 def process_mobile_input(data: dict[str, Any], driver: Any) -> None:
     """Process a text input action on mobile platforms."""
+    from appium.webdriver.common.appiumby import AppiumBy
+
     if "bounds" in data:
         left, top, right, bottom = parse_bounds(data["bounds"])
         tap_x = left + (right - left) / 2
@@ -114,6 +131,415 @@ def process_mobile_swipe(data: dict[str, Any], driver: Any) -> None:
     sleep(duration / 1000)
 
 
+def find_visible_elements(
+    data: dict[str, Any], driver: Any, platform: str
+) -> list[Any]:
+    """Return the displayed elements matching the locator of ``data``."""
+    if platform == "web":
+        from selenium.webdriver.common.by import By
+
+        if "css" in data:
+            by, value = By.CSS_SELECTOR, data["css"]
+        else:
+            by, value = By.XPATH, data["xpath"]
+    else:
+        from appium.webdriver.common.appiumby import AppiumBy
+
+        by, value = AppiumBy.XPATH, data["xpath"]
+    return [
+        element
+        for element in driver.find_elements(by, value)
+        if element.is_displayed()
+    ]
+
+
+def source_hash(driver: Any) -> str:
+    """Return a digest of the current page source."""
+    return hashlib.sha1(driver.page_source.encode("utf-8")).hexdigest()
+
+
+def scroll_mobile_page(driver: Any, platform: str, direction: str) -> None:
+    """Scroll the screen once, preferring the driver's native scroll command."""
+    size = driver.get_window_size()
+    width, height = size["width"], size["height"]
+    try:
+        if platform == "android":
+            driver.execute_script(
+                "mobile: scrollGesture",
+                {
+                    "left": int(width * 0.1),
+                    "top": int(height * 0.2),
+                    "width": int(width * 0.8),
+                    "height": int(height * 0.6),
+                    "direction": direction,
+                    "percent": 0.75,
+                },
+            )
+            return
+        if platform == "ios":
+            driver.execute_script("mobile: scroll", {"direction": direction})
+            return
+    except Exception as err:
+        logging.info(f"Native scroll failed, falling back to swipe: {err}")
+    offsets = {
+        "down": (0, -0.3),
+        "up": (0, 0.3),
+        "right": (-0.3, 0),
+        "left": (0.3, 0),
+    }
+    offset_x, offset_y = offsets[direction]
+    driver.swipe(
+        int(width / 2),
+        int(height / 2),
+        int(width * (0.5 + offset_x)),
+        int(height * (0.5 + offset_y)),
+        300,
+    )
+
+
+def scroll_web_page(driver: Any, direction: str) -> None:
+    """Scroll the window by most of a viewport."""
+    steps = {
+        "down": "0, window.innerHeight * 0.8",
+        "up": "0, -window.innerHeight * 0.8",
+        "right": "window.innerWidth * 0.8, 0",
+        "left": "-window.innerWidth * 0.8, 0",
+    }
+    driver.execute_script(f"window.scrollBy({steps[direction]});")
+
+
+def process_scroll_to(data: dict[str, Any], driver: Any, platform: str) -> None:
+    """Scroll until the located element is visible without asking the LLM.
+
+    The screen is scrolled in ``direction`` and checked for the element
+    after every scroll. Scrolling stops when the element shows up, after
+    ``max_swipes`` scrolls, or when the page source no longer changes
+    because the end of the list was reached.
+    """
+    direction = data.get("direction", "down")
+    max_swipes = data.get("max_swipes", 10)
+    previous_hash = None
+    swipes = 0
+
+    while True:
+        elements = find_visible_elements(data, driver, platform)
+        if elements:
+            if platform == "web":
+                driver.execute_script(
+                    "arguments[0].scrollIntoView({block: 'center'});", elements[0]
+                )
+            target_box = element_box(elements[0], driver, platform)
+            if target_box is not None:
+                data["target_bounds"] = format_bounds(target_box)
+            data["swipes"] = swipes
+            data["result"] = "success"
+            return
+
+        current_hash = source_hash(driver)
+        if current_hash == previous_hash:
+            reason = "end of list reached"
+            break
+        if swipes >= max_swipes:
+            reason = f"gave up after {swipes} swipes"
+            break
+        previous_hash = current_hash
+
+        if platform == "web":
+            scroll_web_page(driver, direction)
+        else:
+            scroll_mobile_page(driver, platform, direction)
+        swipes += 1
+
+    data["swipes"] = swipes
+    data["result"] = f"error: element not found, {reason}"
+
+
+def element_box(
+    element: Any, driver: Any, platform: str
+) -> Optional[Tuple[int, int, int, int]]:
+    """Return the on-screen box of an element as left, top, right, bottom.
+
+    On web the box is taken relative to the viewport, which is what the
+    screenshot shows, rather than to the scrolled page.
+    """
+    try:
+        if platform == "web":
+            rect = driver.execute_script(
+                "const r = arguments[0].getBoundingClientRect();"
+                " return {x: r.left, y: r.top, width: r.width, height: r.height};",
+                element,
+            )
+        else:
+            rect = element.rect
+    except Exception:
+        return None
+    left, top = int(rect["x"]), int(rect["y"])
+    return left, top, left + int(rect["width"]), top + int(rect["height"])
+
+
+def verification_image(
+    driver: Any,
+    platform: str,
+    folder: str,
+    step_name: str,
+    screenshot_file: str,
+    image_policy: Optional[dict[str, Any]],
+    target_box: Optional[Tuple[int, int, int, int]],
+) -> Optional[str]:
+    """Pick the screenshot sent with a verification prompt.
+
+    With the ``target`` crop mode the image is cropped around the verified
+    element; ``None`` is returned when the policy disables images.
+    """
+    if image_policy is None:
+        return screenshot_file
+    if not image_policy["send"]:
+        return None
+    if image_policy["crop"] != "target" or target_box is None:
+        return screenshot_file
+    raw_file = f"{folder}/{step_name}.png"
+    try:
+        if platform == "web":
+            screen_width = driver.execute_script("return window.innerWidth;")
+        else:
+            screen_width = driver.get_window_size()["width"]
+        factor = image_size(raw_file)[0] / screen_width
+    except Exception:
+        factor = 1
+    cropped = crop_for_region(
+        raw_file,
+        f"{folder}/{step_name}_target.{image_extension(image_policy)}",
+        image_policy,
+        scale_box(target_box, factor),
+    )
+    return cropped or screenshot_file
+
+
+def format_bounds(box: Tuple[int, int, int, int]) -> str:
+    """Format coordinates as a bounds string."""
+    left, top, right, bottom = box
+    return f"[{left},{top}][{right},{bottom}]"
+
+
+BOUNDS_PATTERN = re.compile(r"^\[-?\d+,-?\d+\]\[-?\d+,-?\d+\]$")
+LOCATOR_KEYS = ("xpath", "css", "bounds")
+
+# Fields each action requires; a tuple means at least one of its keys.
+ACTION_SCHEMA: dict[str, list[Any]] = {
+    "tap": [LOCATOR_KEYS],
+    "input": [LOCATOR_KEYS, "value"],
+    "swipe": [],
+    "scroll_to": [("xpath", "css")],
+    "wait": [],
+    "verify": [],
+    "error": [],
+    "finish": [],
+}
+NUMERIC_FIELDS = (
+    "swipe_start_x",
+    "swipe_start_y",
+    "swipe_end_x",
+    "swipe_end_y",
+    "duration",
+    "timeout",
+    "max_swipes",
+)
+MOBILE_SWIPE_FIELDS = NUMERIC_FIELDS[:4]
+SCROLL_DIRECTIONS = {"up", "down", "left", "right"}
+TERMINAL_ACTIONS = {"error", "finish"}
+
+ActionHandler = Callable[[dict[str, Any], Any, str], None]
+ACTION_HANDLERS: dict[str, ActionHandler] = {}
+
+
+def register_action(name: str) -> Callable[[ActionHandler], ActionHandler]:
+    """Return a decorator that registers a handler for ``name`` actions."""
+
+    def decorator(handler: ActionHandler) -> ActionHandler:
+        ACTION_HANDLERS[name] = handler
+        return handler
+
+    return decorator
+
+
+def validate_action(data: Any, platform: str) -> Optional[str]:
+    """Return why ``data`` is not a valid action, or ``None`` if it is."""
+    if not isinstance(data, dict):
+        return "action must be a JSON object"
+    name = data.get("action")
+    if not isinstance(name, str) or name not in ACTION_SCHEMA:
+        return f"unknown action: {name}"
+    for field in ACTION_SCHEMA[name]:
+        if isinstance(field, tuple):
+            if not any(key in data for key in field):
+                return f"{name} requires one of {', '.join(field)}"
+        elif field not in data:
+            return f"{name} requires {field}"
+    if name == "swipe" and platform != "web":
+        missing = [key for key in MOBILE_SWIPE_FIELDS if key not in data]
+        if missing:
+            return f"swipe requires {', '.join(missing)}"
+    if name == "scroll_to" and platform != "web" and "xpath" not in data:
+        return "scroll_to requires xpath on mobile"
+    for key in NUMERIC_FIELDS:
+        value = data.get(key, 0)
+        if isinstance(value, bool) or not isinstance(value, (int, float)):
+            return f"{key} must be a number"
+    direction = data.get("direction", "down")
+    if not isinstance(direction, str) or direction not in SCROLL_DIRECTIONS:
+        return f"invalid direction: {data['direction']}"
+    if "bounds" in data and not BOUNDS_PATTERN.match(str(data["bounds"])):
+        return f"invalid bounds: {data['bounds']}"
+    return None
+
+
+def parse_actions(action: str) -> list[Any]:
+    """Parse LLM output into a list of actions.
+
+    A single action object, a JSON array of actions and an object with an
+    ``actions`` array are accepted.
+    """
+    data = json.loads(action)
+    if isinstance(data, dict) and isinstance(data.get("actions"), list):
+        return data["actions"]
+    if isinstance(data, list):
+        return data
+    return [data]
+
+
+@register_action("tap")
+def handle_tap(data: dict[str, Any], driver: Any, platform: str) -> None:
+    """Tap or click the located element."""
+    logging.info("Action Tap")
+    if platform == "web":
+        process_web_click(data, driver)
+    else:
+        process_mobile_tap(data, driver)
+    data["result"] = "success"
+
+
+@register_action("input")
+def handle_input(data: dict[str, Any], driver: Any, platform: str) -> None:
+    """Type the value into the located element."""
+    logging.info("Action Input")
+    if platform == "web":
+        process_web_input(data, driver)
+    else:
+        process_mobile_input(data, driver)
+    data["result"] = "success"
+
+
+@register_action("swipe")
+def handle_swipe(data: dict[str, Any], driver: Any, platform: str) -> None:
+    """Swipe on mobile or scroll the page on web."""
+    logging.info("Action Swipe")
+    if platform == "web":
+        process_web_scroll(data, driver)
+    else:
+        process_mobile_swipe(data, driver)
+    data["result"] = "success"
+
+
+@register_action("scroll_to")
+def handle_scroll_to(data: dict[str, Any], driver: Any, platform: str) -> None:
+    """Scroll until the located element is visible."""
+    logging.info("Action Scroll To")
+    process_scroll_to(data, driver, platform)
+
+
+@register_action("wait")
+def handle_wait(data: dict[str, Any], driver: Any, platform: str) -> None:
+    """Sleep for ``timeout`` milliseconds."""
+    logging.info("Action Wait")
+    sleep(data.get("timeout", 5000) / 1000)
+    data["result"] = "success"
+
+
+@register_action("verify")
+def handle_verify(data: dict[str, Any], driver: Any, platform: str) -> None:
+    """Check the text or clickability of the located element."""
+    logging.info("Action Verify")
+    if not any(key in data for key in LOCATOR_KEYS):
+        data["result"] = "success"
+        return
+    if platform == "web":
+        from selenium.webdriver.common.by import By
+    try:
+        if "xpath" in data:
+            if platform == "web":
+                element = driver.find_element(By.XPATH, data["xpath"])
+            else:
+                from appium.webdriver.common.appiumby import AppiumBy
+
+                element = driver.find_element(AppiumBy.XPATH, data["xpath"])
+        elif "css" in data and platform == "web":
+            element = driver.find_element(By.CSS_SELECTOR, data["css"])
+        elif "bounds" in data and platform == "web":
+            left, top, right, bottom = parse_bounds(data["bounds"])
+            click_x = left + (right - left) / 2
+            click_y = top + (bottom - top) / 2
+            element = driver.execute_script(
+                "return document.elementFromPoint(arguments[0], arguments[1]);",
+                click_x,
+                click_y,
+            )
+        else:
+            raise ValueError("Unsupported locator for verification")
+
+        target_box = (
+            parse_bounds(data["bounds"])
+            if "bounds" in data
+            else element_box(element, driver, platform)
+        )
+        if target_box is not None:
+            data["target_bounds"] = format_bounds(target_box)
+
+        expected_text = data.get("text")
+        check_clickable = data.get("clickable")
+        verified = True
+
+        if expected_text is not None:
+            actual_text = (
+                element.text
+                if platform == "web"
+                else element.get_attribute("text") or element.text
+            )
+            if actual_text != expected_text:
+                data["actual_text"] = actual_text
+                verified = False
+
+        if check_clickable:
+            is_clickable = element.is_enabled() and element.is_displayed()
+            data["clickable"] = is_clickable
+            verified = verified and is_clickable
+
+        data["verified"] = verified
+        data["result"] = "success" if verified else "failure"
+    except Exception as err:
+        data["result"] = f"error: {err}"
+
+
+def needs_capture(data: dict[str, Any]) -> bool:
+    """Return whether an action needs the screen captured right after it.
+
+    Only verification prompts look at the screen; every other action in a
+    batch runs back-to-back and the screen is captured once at the end.
+    """
+    return data.get("action") == "verify" and bool(data.get("prompt"))
+
+
+def final_action(result_data: dict[str, Any]) -> Optional[str]:
+    """Return the last action executed for a single or batch step result."""
+    if result_data.get("action") == "batch":
+        executed = [
+            item
+            for item in result_data.get("actions", [])
+            if item.get("result") != "skipped"
+        ]
+        return executed[-1].get("action") if executed else None
+    return result_data.get("action")
+
+
 def process_next_action(
     action: str,
     driver: Any,
@@ -122,108 +548,96 @@ def process_next_action(
     platform: str,
     take_page_source_fn: Callable[[Any, str, str, str], str],
     take_screenshot_fn: Callable[[Any, str, str, str], str],
+    image_policy: Optional[dict[str, Any]] = None,
+    model: str = DEFAULT_MODEL,
 ) -> Tuple[str | None, str | None, str]:
-    """Process a JSON-formatted action and execute it on the driver."""
+    """Process JSON-formatted actions and execute them on the driver.
+
+    A batch of actions runs in order until one of them does not succeed;
+    the remaining actions are marked as skipped. The page is captured after
+    the last action and after any verification that needs it.
+    """
     try:
-        data = json.loads(action)
+        actions = parse_actions(action)
     except json.JSONDecodeError:
         print(f"Invalid JSON action: {action}")
         return None, None, '{"action": "error", "result": "Invalid JSON"}'
+    actions = [
+        item if isinstance(item, dict) else {"action": None, "value": item}
+        for item in actions
+    ]
+    if not actions:
+        print(f"No action in: {action}")
+        return None, None, '{"action": "error", "result": "No action"}'
 
-    if data["action"] in {"error", "finish"}:
-        page_source_file = take_page_source_fn(driver, folder, step_name, platform)
-        screenshot_file = take_screenshot_fn(driver, folder, step_name, platform)
-        data["result"] = "success"
-        return page_source_file, screenshot_file, json.dumps(data)
-
-    try:
-        if data["action"] == "tap":
-            logging.info("Action Tap")
-            if platform == "web":
-                process_web_click(data, driver)
-            else:
-                process_mobile_tap(data, driver)
+    page_source_file = screenshot_file = None
+    results: list[Any] = []
+    for index, data in enumerate(actions):
+        error = validate_action(data, platform)
+        if error is not None:
+            print(f"Invalid action: {error}")
+            data["result"] = f"error: invalid action: {error}"
+        elif data["action"] in TERMINAL_ACTIONS:
             data["result"] = "success"
-        elif data["action"] == "input":
-            logging.info("Action Input")
-            if platform == "web":
-                process_web_input(data, driver)
-            else:
-                process_mobile_input(data, driver)
-            data["result"] = "success"
-        elif data["action"] == "swipe":
-            logging.info("Action Swipe")
-            if platform == "web":
-                process_web_scroll(data, driver)
-            else:
-                process_mobile_swipe(data, driver)
-            data["result"] = "success"
-        elif data["action"] == "wait":
-            logging.info("Action Wait")
-            sleep(data.get("timeout", 5000) / 1000)
-            data["result"] = "success"
-        elif data["action"] == "verify":
-            logging.info("Action Verify")
-            if any(key in data for key in ["xpath", "css", "bounds"]):
-                try:
-                    if "xpath" in data:
-                        if platform == "web":
-                            element = driver.find_element(By.XPATH, data["xpath"])
-                        else:
-                            element = driver.find_element(AppiumBy.XPATH, data["xpath"])
-                    elif "css" in data and platform == "web":
-                        element = driver.find_element(By.CSS_SELECTOR, data["css"])
-                    elif "bounds" in data and platform == "web":
-                        left, top, right, bottom = parse_bounds(data["bounds"])
-                        click_x = left + (right - left) / 2
-                        click_y = top + (bottom - top) / 2
-                        element = driver.execute_script(
-                            "return document.elementFromPoint(arguments[0], arguments[1]);",
-                            click_x,
-                            click_y,
-                        )
-                    else:
-                        raise ValueError("Unsupported locator for verification")
-
-                    expected_text = data.get("text")
-                    check_clickable = data.get("clickable")
-                    verified = True
-
-                    if expected_text is not None:
-                        actual_text = (
-                            element.text
-                            if platform == "web"
-                            else element.get_attribute("text") or element.text
-                        )
-                        if actual_text != expected_text:
-                            data["actual_text"] = actual_text
-                            verified = False
-
-                    if check_clickable:
-                        is_clickable = element.is_enabled() and element.is_displayed()
-                        data["clickable"] = is_clickable
-                        verified = verified and is_clickable
-
-                    data["verified"] = verified
-                    data["result"] = "success" if verified else "failure"
-                except Exception as err:
-                    data["result"] = f"error: {err}"
-            else:
-                data["result"] = "success"
         else:
-            print(f"Unknown action: {data['action']}")
-            data["result"] = "unknown action"
-    except Exception as err:
-        print(f"Error processing action: {err}")
-        data["result"] = f"error: {err}"
+            try:
+                ACTION_HANDLERS[data["action"]](data, driver, platform)
+            except Exception as err:
+                print(f"Error processing action: {err}")
+                data["result"] = f"error: {err}"
+        results.append(data)
 
-    page_source_file = take_page_source_fn(driver, folder, step_name, platform)
-    screenshot_file = take_screenshot_fn(driver, folder, step_name, platform)
+        stop = data["result"] != "success" or data["action"] in TERMINAL_ACTIONS
+        last = stop or index == len(actions) - 1
+        if last or needs_capture(data):
+            capture_name = step_name if last else f"{step_name}_{index + 1}"
+            page_source_file = take_page_source_fn(
+                driver, folder, capture_name, platform
+            )
+            screenshot_file = take_screenshot_fn(
+                driver, folder, capture_name, platform
+            )
 
-    if data.get("action") == "verify" and data.get("prompt"):
-        response = verify_result(
-            data["prompt"], page_source_file, screenshot_file, platform
-        )
-        data["verification"] = response
+        if needs_capture(data):
+            target_bounds = data.get("target_bounds")
+            verify_screenshot = verification_image(
+                driver,
+                platform,
+                folder,
+                capture_name,
+                screenshot_file,
+                image_policy,
+                parse_bounds(target_bounds) if target_bounds else None,
+            )
+            data["verification"] = verify_result(
+                data["prompt"],
+                page_source_file,
+                verify_screenshot,
+                platform,
+                model,
+            )
+
+        if stop:
+            break
+
+    for data in actions[len(results) :]:
+        results.append({**data, "result": "skipped"})
 
-    return page_source_file, screenshot_file, json.dumps(data)
+    if len(results) == 1:
+        return page_source_file, screenshot_file, json.dumps(results[0])
+    failed = [
+        data["result"]
+        for data in results
+        if data["result"] not in {"success", "skipped"}
+    ]
+    return (
+        page_source_file,
+        screenshot_file,
+        json.dumps(
+            {
+                "action": "batch",
+                "actions": results,
+                "result": failed[0] if failed else "success",
+            }
+        ),
+    )
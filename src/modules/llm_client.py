@@ -5,7 +5,8 @@ from __future__ import annotations
 from typing import List, Optional
 import base64
 import json
-import requests
+
+DEFAULT_MODEL = "llama3:70b"
 
 
 def read_file_content(file_path: str) -> Optional[str]:
@@ -60,11 +61,17 @@ def generate_next_action(
     task: str,
     history_actions: List[str],
     page_source_file: str,
-    page_screenshot: str,
+    page_screenshot: Optional[str],
     platform: str,
+    model: str = DEFAULT_MODEL,
 ) -> str:
-    """Generate the next action by sending context to the LLM service."""
-    screenshot_base64 = image_to_base64(page_screenshot)
+    """Generate the next action by sending context to the LLM service.
+
+    ``page_screenshot`` may be ``None`` when the image policy decides the page
+    source alone is enough; the request is then sent without an image.
+    """
+    import requests
+
     page_source = read_file_content(page_source_file) or ""
     history_actions_str = "\n".join(history_actions)
 
@@ -90,7 +97,7 @@ Current platform detected: {platform_context.get(platform, 'Unknown platform')}
 {page_source}
 ```
 
-Based on the current {platform.upper()} screenshot and source above, determine the next action to complete the task.
+Based on the current {platform.upper()} {'screenshot and ' if page_screenshot else ''}source above, determine the next action to complete the task.
 
 IMPORTANT FOR {platform.upper()}:
 {get_platform_specific_instructions(platform)}
@@ -98,12 +105,13 @@ IMPORTANT FOR {platform.upper()}:
 Next action:"""
 
     payload = {
-        "model": "llama3:70b",
+        "model": model,
         "prompt": full_prompt,
-        "images": [screenshot_base64],
         "stream": False,
-        "options": {"num_predict": 200},
+        "options": {"num_predict": 400},
     }
+    if page_screenshot:
+        payload["images"] = [image_to_base64(page_screenshot)]
 
     try:
         response = requests.post(
@@ -126,12 +134,13 @@ Next action:"""
 def verify_result(
     question: str,
     page_source_file: str,
-    page_screenshot: str,
+    page_screenshot: Optional[str],
     platform: str,
+    model: str = DEFAULT_MODEL,
 ) -> str:
     """Verify page state using the language model service."""
+    import requests
 
-    screenshot_base64 = image_to_base64(page_screenshot)
     page_source = read_file_content(page_source_file) or ""
 
     full_prompt = (
@@ -142,12 +151,13 @@ def verify_result(
     )
 
     payload = {
-        "model": "llama3:70b",
+        "model": model,
         "prompt": full_prompt,
-        "images": [screenshot_base64],
         "stream": False,
         "options": {"num_predict": 200},
     }
+    if page_screenshot:
+        payload["images"] = [image_to_base64(page_screenshot)]
 
     try:
         response = requests.post(
@@ -0,0 +1,68 @@
+import argparse
+import datetime
+import os
+import sys
+
+from src.utils.report_store import ReportStore
+
+
+def parse_since(value):
+    """Accept either a date/time prefix or a number of days such as ``7d``"""
+    if value and value.endswith("d") and value[:-1].isdigit():
+        since = datetime.datetime.now() - datetime.timedelta(days=int(value[:-1]))
+        return since.isoformat(sep=" ", timespec="seconds")
+    return value
+
+
+def print_rows(rows):
+    """Print query rows as an aligned table"""
+    if not rows:
+        print("No results")
+        return
+    columns = rows[0].keys()
+    table = [columns] + [
+        ["" if row[column] is None else str(row[column]) for column in columns]
+        for row in rows
+    ]
+    widths = [max(len(line[i]) for line in table) for i in range(len(columns))]
+    for line in table:
+        print("  ".join(cell.ljust(width) for cell, width in zip(line, widths)))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Query the report index")
+    parser.add_argument(
+        "command",
+        choices=["summary", "trend", "failures", "slowest", "usage"],
+        help="Report to print",
+    )
+    parser.add_argument(
+        "--store", default="./reports/reports.db", help="Report index database"
+    )
+    parser.add_argument(
+        "--since", help="Only include runs since a date (2024-05-01) or days (7d)"
+    )
+    parser.add_argument(
+        "--limit", type=int, default=10, help="Number of slowest steps"
+    )
+
+    args = parser.parse_args()
+
+    if not os.path.isfile(args.store):
+        print(f"Error: no report index at {args.store}")
+        sys.exit(1)
+    store = ReportStore(args.store, read_only=True)
+    since = parse_since(args.since)
+
+    if args.command == "summary":
+        print_rows(store.summary(since))
+    elif args.command == "trend":
+        print_rows(store.trend(since))
+    elif args.command == "failures":
+        print_rows(store.failures(since))
+    elif args.command == "slowest":
+        print_rows(store.slowest_steps(args.limit, since))
+    else:
+        print_rows([store.disk_usage()])
+
+    store.close()
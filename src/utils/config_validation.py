@@ -0,0 +1,59 @@
+"""Checks for prompt, task and platform configuration files."""
+
+from __future__ import annotations
+
+from typing import Any, List, Optional
+
+from .driver_utils import SUPPORTED_BROWSERS, SUPPORTED_PLATFORMS
+from .image_utils import resolve_image_policy
+
+REQUIRED_CONFIG_KEYS = {
+    "ios": ["udid", "bundleId"],
+    "android": ["appPackage", "appActivity"],
+    "web": [],
+}
+
+
+def validate_inputs(
+    prompt: Optional[str], tasks: Any, platform_config: Any, model: str
+) -> List[str]:
+    """Return the problems found in the inputs of a run, if any."""
+    errors = []
+
+    if not prompt or not prompt.strip():
+        errors.append("Prompt file is empty")
+
+    if not isinstance(platform_config, dict):
+        errors.append("Platform configuration must be a JSON object")
+        platform_config = {}
+    platform = str(platform_config.get("platform", "")).lower()
+    if platform not in SUPPORTED_PLATFORMS:
+        errors.append(f"Unsupported platform: {platform}")
+    for key in REQUIRED_CONFIG_KEYS.get(platform, []):
+        if not platform_config.get(key):
+            errors.append(f"Missing '{key}' for platform {platform}")
+    if platform == "web":
+        browser = str(platform_config.get("browser", "chrome")).lower()
+        if browser not in SUPPORTED_BROWSERS:
+            errors.append(f"Unsupported browser: {browser}")
+
+    if not isinstance(tasks, list):
+        errors.append("Task file must contain a JSON list of tasks")
+        tasks = []
+    names = set()
+    for index, task in enumerate(tasks):
+        if not isinstance(task, dict):
+            errors.append(f"Task {index} must be a JSON object")
+            continue
+        for key in ["task", "details"]:
+            if not isinstance(task.get(key), str) or not task[key].strip():
+                errors.append(f"Task {index} is missing '{key}'")
+        if task.get("task") in names:
+            errors.append(f"Task {index} duplicates name '{task['task']}'")
+        names.add(task.get("task"))
+        try:
+            resolve_image_policy(platform_config, model, task)
+        except (ValueError, TypeError, AttributeError) as err:
+            errors.append(f"Task {index} has an invalid image policy: {err}")
+
+    return errors
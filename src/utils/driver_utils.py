@@ -5,17 +5,18 @@ from __future__ import annotations
 from typing import Any
 from time import sleep
 
-from appium import webdriver as appium_webdriver
-from appium.options.common import AppiumOptions
-from selenium import webdriver as selenium_webdriver
-from selenium.webdriver.chrome.options import Options as ChromeOptions
-from selenium.webdriver.firefox.options import Options as FirefoxOptions
+SUPPORTED_PLATFORMS = {"ios", "android", "web"}
+SUPPORTED_BROWSERS = {"chrome", "firefox"}
 
 
 def create_driver(appium_server: str, platform_config: dict[str, Any]) -> Any:
     """Create a driver based on the provided platform configuration."""
     platform = platform_config.get("platform", "").lower()
 
+    if platform in {"ios", "android"}:
+        from appium import webdriver as appium_webdriver
+        from appium.options.common import AppiumOptions
+
     if platform == "ios":
         server = f"http://{appium_server}/wd/hub"
         capabilities = {
@@ -49,6 +50,9 @@ def create_driver(appium_server: str, platform_config: dict[str, Any]) -> Any:
     if platform == "web":
         browser = platform_config.get("browser", "chrome").lower()
         if browser == "chrome":
+            from selenium import webdriver as selenium_webdriver
+            from selenium.webdriver.chrome.options import Options as ChromeOptions
+
             options = ChromeOptions()
             if platform_config.get("headless", False):
                 options.add_argument("--headless")
@@ -56,6 +60,9 @@ def create_driver(appium_server: str, platform_config: dict[str, Any]) -> Any:
             options.add_argument("--disable-dev-shm-usage")
             return selenium_webdriver.Chrome(options=options)
         if browser == "firefox":
+            from selenium import webdriver as selenium_webdriver
+            from selenium.webdriver.firefox.options import Options as FirefoxOptions
+
             options = FirefoxOptions()
             if platform_config.get("headless", False):
                 options.add_argument("--headless")
@@ -0,0 +1,174 @@
+"""Helpers for preparing screenshots before they are sent to the LLM."""
+
+from __future__ import annotations
+
+import copy
+import os
+from typing import Any, Optional, Tuple
+
+Box = Tuple[int, int, int, int]
+
+DEFAULT_IMAGE_POLICY: dict[str, Any] = {
+    "send": True,
+    "max_long": 2048,
+    "max_short": 768,
+    "format": "jpeg",
+    "quality": 85,
+    "grayscale": False,
+    "crop": "none",
+    "crop_padding": 48,
+    "crop_max_area": 0.5,
+}
+
+IMAGE_EXTENSIONS = {"jpeg": "jpg", "webp": "webp"}
+
+
+def resolve_image_policy(
+    platform_config: dict[str, Any],
+    model: str,
+    task: Optional[dict[str, Any]] = None,
+) -> dict[str, Any]:
+    """Merge the default, config, per-model and per-task image settings.
+
+    ``platform_config["image"]`` holds the suite-wide settings, its
+    ``models`` mapping overrides them per model name and ``task["image"]``
+    overrides everything for a single task.
+    """
+    policy = copy.deepcopy(DEFAULT_IMAGE_POLICY)
+    config_policy = dict(platform_config.get("image") or {})
+    model_policies = config_policy.pop("models", {}) or {}
+    policy.update(config_policy)
+    policy.update(model_policies.get(model, {}))
+    if task:
+        policy.update(task.get("image") or {})
+    policy["format"] = str(policy["format"]).lower()
+    if policy["format"] not in IMAGE_EXTENSIONS:
+        raise ValueError(f"Unsupported image format: {policy['format']}")
+    if policy["crop"] not in {"none", "changed", "target"}:
+        raise ValueError(f"Unsupported crop mode: {policy['crop']}")
+    return policy
+
+
+def image_extension(policy: Optional[dict[str, Any]]) -> str:
+    """Return the file extension used for images produced by ``policy``."""
+    policy = policy or DEFAULT_IMAGE_POLICY
+    return IMAGE_EXTENSIONS[policy["format"]]
+
+
+def image_size(image_path: str) -> Tuple[int, int]:
+    """Return the width and height of an image file."""
+    from PIL import Image
+
+    with Image.open(image_path) as img:
+        return img.size
+
+
+def resize_image(img, max_long=2048, max_short=768):
+    """Resize the image maintaining aspect ratio"""
+    original_width, original_height = img.size
+    aspect_ratio = original_width / original_height
+
+    if aspect_ratio > 1:
+        new_width = min(original_width, max_long)
+        new_height = int(new_width / aspect_ratio)
+        new_height = min(new_height, max_short)
+        new_width = int(new_height * aspect_ratio)
+    else:
+        new_height = min(original_height, max_long)
+        new_width = int(new_height * aspect_ratio)
+        new_width = min(new_width, max_short)
+        new_height = int(new_width / aspect_ratio)
+
+    return img.resize((max(new_width, 1), max(new_height, 1)))
+
+
+def expand_box(box: Box, padding: int, size: Tuple[int, int]) -> Box:
+    """Grow ``box`` by ``padding`` pixels, clamped to an image of ``size``."""
+    left, top, right, bottom = box
+    width, height = size
+    return (
+        max(left - padding, 0),
+        max(top - padding, 0),
+        min(right + padding, width),
+        min(bottom + padding, height),
+    )
+
+
+def scale_box(box: Box, factor: float) -> Box:
+    """Scale a box from screen coordinates to screenshot pixels."""
+    return tuple(int(round(value * factor)) for value in box)  # type: ignore
+
+
+def changed_region(previous_path: str, current_path: str) -> Optional[Box]:
+    """Return the bounding box of pixels that differ between two screenshots.
+
+    ``None`` is returned when the screenshots cannot be compared or nothing
+    changed.
+    """
+    if not previous_path or not os.path.exists(previous_path):
+        return None
+    from PIL import Image, ImageChops
+
+    with Image.open(previous_path) as previous, Image.open(current_path) as current:
+        if previous.size != current.size:
+            return None
+        diff = ImageChops.difference(
+            previous.convert("RGB"), current.convert("RGB")
+        )
+        return diff.getbbox()
+
+
+def format_image(
+    image_path: str,
+    output_path: str,
+    policy: Optional[dict[str, Any]] = None,
+    region: Optional[Box] = None,
+) -> str:
+    """Format image for consistent processing
+
+    The image is optionally cropped to ``region`` (in pixels of the source
+    image), converted to grayscale, downscaled and encoded according to
+    ``policy``.
+    """
+    from PIL import Image
+
+    policy = policy or DEFAULT_IMAGE_POLICY
+    with Image.open(image_path) as img:
+        width, height = img.size
+        new_img = Image.new("RGB", (width, height), "white")
+        new_img.paste(img)
+    if region:
+        new_img = new_img.crop(
+            expand_box(region, policy["crop_padding"], new_img.size)
+        )
+    if policy["grayscale"]:
+        new_img = new_img.convert("L")
+    new_img = resize_image(new_img, policy["max_long"], policy["max_short"])
+    save_kwargs: dict[str, Any] = {}
+    if policy["format"] in {"jpeg", "webp"}:
+        save_kwargs["quality"] = policy["quality"]
+    new_img.save(output_path, format=policy["format"].upper(), **save_kwargs)
+    return output_path
+
+
+def crop_for_region(
+    image_path: str,
+    output_path: str,
+    policy: dict[str, Any],
+    region: Optional[Box],
+) -> Optional[str]:
+    """Write a cropped copy of ``image_path`` if ``region`` is small enough.
+
+    Returns ``None`` when no region is given or it covers more than
+    ``crop_max_area`` of the screen, in which case the full image should be
+    used.
+    """
+    if not region:
+        return None
+    width, height = image_size(image_path)
+    left, top, right, bottom = expand_box(
+        region, policy["crop_padding"], (width, height)
+    )
+    if (right - left) * (bottom - top) > policy["crop_max_area"] * width * height:
+        return None
+    return format_image(image_path, output_path, policy, region)
@@ -0,0 +1,280 @@
+"""Indexed SQLite store of task runs, steps and report artifacts."""
+
+from __future__ import annotations
+
+import datetime
+import glob
+import hashlib
+import json
+import os
+import re
+import sqlite3
+from typing import Iterable, List, Optional
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS tasks (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL,
+    folder TEXT NOT NULL UNIQUE,
+    started TEXT NOT NULL,
+    finished TEXT,
+    status TEXT
+);
+CREATE TABLE IF NOT EXISTS steps (
+    task_id INTEGER NOT NULL REFERENCES tasks(id),
+    step INTEGER NOT NULL,
+    action TEXT,
+    result TEXT,
+    explanation TEXT,
+    started TEXT NOT NULL,
+    llm_ms REAL,
+    action_ms REAL,
+    PRIMARY KEY (task_id, step)
+);
+CREATE TABLE IF NOT EXISTS artifacts (
+    hash TEXT PRIMARY KEY,
+    path TEXT NOT NULL,
+    size INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS step_artifacts (
+    task_id INTEGER NOT NULL,
+    step INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    hash TEXT NOT NULL REFERENCES artifacts(hash),
+    PRIMARY KEY (task_id, step, name)
+);
+CREATE INDEX IF NOT EXISTS tasks_started ON tasks(started);
+CREATE INDEX IF NOT EXISTS tasks_name ON tasks(name);
+CREATE INDEX IF NOT EXISTS steps_started ON steps(started);
+"""
+
+PASSED_STATUS = "finish"
+
+
+def file_hash(path: str) -> str:
+    """Return the SHA-256 hex digest of a file."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as file:
+        for chunk in iter(lambda: file.read(1 << 16), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def current_time() -> str:
+    """Return the current time in the format stored in the index."""
+    return datetime.datetime.now().isoformat(sep=" ", timespec="milliseconds")
+
+
+class ReportStore:
+    """Index of report runs kept next to the loose report files.
+
+    Step artifacts are stored once per content hash under
+    ``<reports>/artifacts`` and the files in the task folders are replaced
+    by hard links to them, so identical screenshots and sources only use
+    disk space once.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        artifacts_folder: Optional[str] = None,
+        read_only: bool = False,
+    ) -> None:
+        self.path = path
+        self.artifacts_folder = artifacts_folder or os.path.join(
+            os.path.dirname(path) or ".", "artifacts"
+        )
+        if read_only:
+            self.connection = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+        else:
+            self.connection = sqlite3.connect(path)
+        self.connection.row_factory = sqlite3.Row
+        if not read_only:
+            self.connection.executescript(SCHEMA)
+
+    def close(self) -> None:
+        """Close the database connection."""
+        self.connection.close()
+
+    def start_task(self, name: str, folder: str) -> int:
+        """Return the id of the task writing to ``folder``, creating it if new."""
+        with self.connection:
+            self.connection.execute(
+                "INSERT OR IGNORE INTO tasks (name, folder, started)"
+                " VALUES (?, ?, ?)",
+                (name, folder, current_time()),
+            )
+            row = self.connection.execute(
+                "SELECT id FROM tasks WHERE folder = ?", (folder,)
+            ).fetchone()
+        return row["id"]
+
+    def finish_task(self, task_id: int, status: str) -> None:
+        """Record the final status of a task."""
+        with self.connection:
+            self.connection.execute(
+                "UPDATE tasks SET finished = ?, status = ? WHERE id = ?",
+                (current_time(), status, task_id),
+            )
+
+    def record_step(
+        self,
+        task_id: int,
+        step: int,
+        action_result: str,
+        started: str,
+        llm_ms: Optional[float],
+        action_ms: Optional[float],
+    ) -> None:
+        """Index the result and timings of a step."""
+        data = json.loads(action_result)
+        with self.connection:
+            self.connection.execute(
+                "INSERT OR REPLACE INTO steps (task_id, step, action, result,"
+                " explanation, started, llm_ms, action_ms)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    task_id,
+                    step,
+                    str(data.get("action")),
+                    str(data.get("result")),
+                    str(data.get("explanation", "")),
+                    started,
+                    llm_ms,
+                    action_ms,
+                ),
+            )
+
+    def truncate_steps(self, task_id: int, step: int) -> None:
+        """Forget the steps of a task after ``step``, e.g. when it is resumed."""
+        with self.connection:
+            for table in ["steps", "step_artifacts"]:
+                self.connection.execute(
+                    f"DELETE FROM {table} WHERE task_id = ? AND step > ?",
+                    (task_id, step),
+                )
+
+    def record_artifacts(
+        self, task_id: int, step: int, paths: Iterable[str]
+    ) -> None:
+        """Deduplicate the artifact files of a step and index them."""
+        hashes = [
+            (os.path.basename(path), self.store_artifact(path)) for path in paths
+        ]
+        with self.connection:
+            self.connection.executemany(
+                "INSERT OR REPLACE INTO step_artifacts (task_id, step, name, hash)"
+                " VALUES (?, ?, ?, ?)",
+                [(task_id, step, name, digest) for name, digest in hashes],
+            )
+
+    def store_artifact(self, path: str) -> str:
+        """Store ``path`` by content hash and hard link it to the stored copy."""
+        digest = file_hash(path)
+        _, extension = os.path.splitext(path)
+        blob = os.path.join(self.artifacts_folder, digest[:2], digest + extension)
+        try:
+            if os.path.exists(blob):
+                if not os.path.samefile(blob, path):
+                    os.remove(path)
+                    os.link(blob, path)
+            else:
+                os.makedirs(os.path.dirname(blob), exist_ok=True)
+                os.link(path, blob)
+        except OSError as err:
+            # Hard links are not available everywhere, keep the loose file.
+            print(f"Unable to deduplicate {path}: {err}")
+            blob = path
+        with self.connection:
+            self.connection.execute(
+                "INSERT OR IGNORE INTO artifacts (hash, path, size)"
+                " VALUES (?, ?, ?)",
+                (digest, blob, os.path.getsize(path)),
+            )
+        return digest
+
+    def summary(self, since: Optional[str] = None) -> List[sqlite3.Row]:
+        """Return pass/fail counts per task name."""
+        return self.connection.execute(
+            "SELECT name, COUNT(*) AS runs,"
+            " SUM(status = ?) AS passed,"
+            " SUM(status IS NOT NULL AND status != ?) AS failed,"
+            " SUM(status IS NULL) AS unfinished,"
+            " MAX(started) AS last_run"
+            " FROM tasks WHERE started >= ? GROUP BY name ORDER BY name",
+            (PASSED_STATUS, PASSED_STATUS, since or ""),
+        ).fetchall()
+
+    def trend(self, since: Optional[str] = None) -> List[sqlite3.Row]:
+        """Return pass/fail counts per day."""
+        return self.connection.execute(
+            "SELECT substr(started, 1, 10) AS day, COUNT(*) AS runs,"
+            " SUM(status = ?) AS passed,"
+            " SUM(status IS NOT NULL AND status != ?) AS failed"
+            " FROM tasks WHERE started >= ? GROUP BY day ORDER BY day",
+            (PASSED_STATUS, PASSED_STATUS, since or ""),
+        ).fetchall()
+
+    def failures(self, since: Optional[str] = None) -> List[sqlite3.Row]:
+        """Return failed runs with the last step they reached."""
+        return self.connection.execute(
+            "SELECT tasks.name, tasks.started, tasks.status, tasks.folder,"
+            " steps.step, steps.action, steps.result"
+            " FROM tasks LEFT JOIN steps ON steps.task_id = tasks.id"
+            " AND steps.step = (SELECT MAX(step) FROM steps"
+            " WHERE steps.task_id = tasks.id)"
+            " WHERE tasks.status != ? AND tasks.started >= ?"
+            " ORDER BY tasks.started DESC",
+            (PASSED_STATUS, since or ""),
+        ).fetchall()
+
+    def slowest_steps(
+        self, limit: int = 10, since: Optional[str] = None
+    ) -> List[sqlite3.Row]:
+        """Return the steps with the longest LLM plus action time."""
+        return self.connection.execute(
+            "SELECT tasks.name, steps.step, steps.action, steps.started,"
+            " steps.llm_ms, steps.action_ms,"
+            " COALESCE(steps.llm_ms, 0) + COALESCE(steps.action_ms, 0) AS total_ms"
+            " FROM steps JOIN tasks ON tasks.id = steps.task_id"
+            " WHERE steps.started >= ? ORDER BY total_ms DESC LIMIT ?",
+            (since or "", limit),
+        ).fetchall()
+
+    def disk_usage(self) -> sqlite3.Row:
+        """Return stored artifact bytes against the bytes they stand for."""
+        return self.connection.execute(
+            "SELECT COUNT(DISTINCT step_artifacts.hash) AS unique_artifacts,"
+            " COUNT(*) AS artifacts,"
+            " (SELECT SUM(size) FROM artifacts) AS stored_bytes,"
+            " SUM(artifacts.size) AS logical_bytes"
+            " FROM step_artifacts JOIN artifacts"
+            " ON artifacts.hash = step_artifacts.hash"
+        ).fetchone()
+
+
+def step_artifacts(folder: str, step_name: str) -> List[str]:
+    """Return the report files written for ``step_name`` in ``folder``."""
+    return sorted(
+        glob.glob(os.path.join(folder, f"{step_name}.*"))
+        + glob.glob(os.path.join(folder, f"{step_name}_*"))
+    )
+
+
+def remove_step_captures(folder: str, step_name: str) -> None:
+    """Delete the page captures of a step before they are captured again.
+
+    Captures may be hard links into the store, so they must be unlinked
+    rather than overwritten in place. The step result (``.json``) is kept.
+    """
+    for path in step_artifacts(folder, step_name):
+        if not path.endswith(".json"):
+            os.remove(path)
+
+
+def remove_steps_after(folder: str, step: int) -> None:
+    """Delete every report file of the steps after ``step`` in ``folder``."""
+    for path in glob.glob(os.path.join(folder, "step_*")):
+        match = re.match(r"step_(\d+)[._]", os.path.basename(path))
+        if match and int(match.group(1)) > step:
+            os.remove(path)
@@ -0,0 +1,113 @@
+"""Append-only journal of suite progress used to resume interrupted runs."""
+
+from __future__ import annotations
+
+import datetime
+import json
+import os
+from typing import Any, List, Optional, Tuple
+
+
+class RunJournal:
+    """Record task and step progress as JSON lines.
+
+    Every event is flushed to disk as soon as it is written so the journal
+    survives a crash of the runner. Replaying the events written since the
+    last ``suite_start`` gives the completed tasks and, for an interrupted
+    task, its report folder and action history.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self.tasks: dict[str, dict[str, Any]] = {}
+        self.task_file: Optional[str] = None
+        self._truncated = False
+        if os.path.exists(path):
+            self._replay()
+
+    def _replay(self) -> None:
+        """Rebuild the task state from the events on disk."""
+        with open(self.path, "r", encoding="utf-8") as file:
+            for line in file:
+                self._truncated = not line.endswith("\n")
+                try:
+                    event = json.loads(line)
+                except json.JSONDecodeError:
+                    # A crash can leave a truncated last line behind.
+                    continue
+                self._apply(event)
+
+    def _apply(self, event: dict[str, Any]) -> None:
+        """Update the task state with a single event."""
+        kind = event.get("event")
+        if kind == "suite_start":
+            self.tasks = {}
+            self.task_file = event.get("task_file")
+        elif kind == "task_start":
+            self.tasks[event["task"]] = {
+                "folder": event["folder"],
+                "steps": [],
+                "status": None,
+            }
+        elif kind == "step" and event["task"] in self.tasks:
+            steps = self.tasks[event["task"]]["steps"]
+            del steps[event["step"] - 1 :]
+            steps.append(event["result"])
+        elif kind == "task_end" and event["task"] in self.tasks:
+            self.tasks[event["task"]]["status"] = event["status"]
+
+    def _write(self, event: dict[str, Any]) -> None:
+        """Append an event and sync it to disk before applying it."""
+        event["time"] = datetime.datetime.now().isoformat()
+        with open(self.path, "a", encoding="utf-8") as file:
+            if self._truncated:
+                file.write("\n")
+                self._truncated = False
+            file.write(json.dumps(event) + "\n")
+            file.flush()
+            os.fsync(file.fileno())
+        self._apply(event)
+
+    def start_suite(self, task_file: str) -> None:
+        """Start a fresh run, forgetting the progress of earlier runs."""
+        self._write(
+            {"event": "suite_start", "task_file": os.path.abspath(task_file)}
+        )
+
+    def can_resume(self, task_file: str) -> bool:
+        """Return whether the journaled run used ``task_file``."""
+        return self.task_file in {None, os.path.abspath(task_file)}
+
+    def start_task(self, name: str, folder: str) -> None:
+        """Record that ``name`` started writing reports to ``folder``."""
+        self._write({"event": "task_start", "task": name, "folder": folder})
+
+    def record_step(self, name: str, step: int, action_result: str) -> None:
+        """Record the result of a completed step."""
+        self._write(
+            {"event": "step", "task": name, "step": step, "result": action_result}
+        )
+
+    def finish_task(self, name: str, status: str) -> None:
+        """Record that ``name`` ended with ``status``."""
+        self._write({"event": "task_end", "task": name, "status": status})
+
+    def is_completed(self, name: str) -> bool:
+        """Return whether ``name`` already ran to completion."""
+        return bool(self.tasks.get(name, {}).get("status"))
+
+    def resume_point(self, name: str) -> Optional[Tuple[str, List[str]]]:
+        """Return the report folder and good step history of an unfinished task.
+
+        Trailing steps whose action failed with an error are dropped so they
+        are retried. ``None`` is returned when the task never started.
+        """
+        state = self.tasks.get(name)
+        if state is None or state["status"]:
+            return None
+        history = list(state["steps"])
+        while history and json.loads(history[-1]).get("result", "").startswith(
+            "error"
+        ):
+            history.pop()
+        return state["folder"], history